@@ -9,9 +9,23 @@ Flask dashboard for Sales Report Generation.
 
 from flask import Flask, render_template, request, redirect, url_for, send_from_directory, flash
 from pathlib import Path
+import concurrent.futures
+from concurrent.futures.process import BrokenProcessPool
 import json
 import os
+import threading
+import pandas as pd
 import datetime
+try:
+    # pandas bundles ujson, which parses JSON faster than the stdlib
+    from pandas.io.json import ujson_loads
+except ImportError:
+    ujson_loads = json.loads
+try:
+    # optional: C drop-in replacements for int()/float() on parsed values
+    from fastnumbers import int as to_int, float as to_float
+except ImportError:
+    to_int, to_float = int, float
 from src.report_generator import generate_pdf
 from src.email_service import send_simulated_email
 
@@ -27,63 +41,189 @@ SENT = BASE / "sent_emails"
 REPORTS.mkdir(parents=True, exist_ok=True)
 SENT.mkdir(parents=True, exist_ok=True)
 
+# PDF generation (charts + ReportLab) is CPU-heavy, so it runs in worker
+# processes instead of the request thread; concurrent /generate requests
+# can then use every core.
+_POOL = concurrent.futures.ProcessPoolExecutor(max_workers=os.cpu_count())
+_POOL_LOCK = threading.Lock()
+GENERATE_TIMEOUT = 120  # seconds to wait for one report
+
+# parsed sent_emails metadata: file name -> (mtime, metadata dict)
+# only files that are new or changed get parsed again
+_EMAIL_CACHE: dict[str, tuple[float, dict]] = {}
+_EMAIL_LOCK = threading.Lock()
+
+# sample_data listing, rescanned only when the directory's mtime changes
+_SAMPLE_CACHE = {'mtime': -1, 'files': []}
+_SAMPLE_LOCK = threading.Lock()
+
 def list_sample_files():
     """
     List all files in sample_data that end with .csv or .json
     This feeds the <select> in the dashboard
+    The result is cached until a file is added, removed or renamed.
     """
-    files = []
-    for ext in ("*.csv","*.json"):
-        for p in SAMPLE.glob(ext):
-            files.append(p.name)
-    # sort so order is predictable
-    return sorted(files)
+    with _SAMPLE_LOCK:
+        try:
+            m = os.stat(SAMPLE).st_mtime_ns
+        except FileNotFoundError:
+            # no sample_data folder: nothing to offer
+            _SAMPLE_CACHE['mtime'] = -1
+            _SAMPLE_CACHE['files'] = []
+            return []
+        if m == _SAMPLE_CACHE['mtime']:
+            return list(_SAMPLE_CACHE['files'])
+        # os.scandir gives plain names, no Path object per file
+        files = [e.name for e in os.scandir(SAMPLE) if e.name.endswith(('.csv', '.json'))]
+        # sort so order is predictable
+        _SAMPLE_CACHE['mtime'] = m
+        _SAMPLE_CACHE['files'] = sorted(files)
+        return list(_SAMPLE_CACHE['files'])
 
 def load_rows_from_sample(filename):
     """
-    Read rows from sample CSV or JSON and return list of dicts ready for generator.
+    Read rows from sample CSV or JSON and return them ready for generator.
     For CSV, expects headers like date,order_id,model,quantity,unit_price,country
-    For JSON, expects list of objects with similar keys.
+    and returns a typed pandas DataFrame.
+    For JSON, expects list of objects with similar keys and returns list of dicts.
     """
     p = SAMPLE / filename
     if not p.exists():
         return []
 
     if p.suffix.lower() == ".csv":
-        import csv
-        rows = []
-        with p.open(newline='', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for r in reader:
-                # normalize keys and types
-                # convert numeric fields if present
-                r['quantity'] = int(r.get('quantity', 1))
-                r['unit_price'] = float(r.get('unit_price', r.get('price', 0)))
-                rows.append(r)
-        return rows
+        # let pandas parse straight into typed columns (no per-row Python loop)
+        wanted = {'date', 'order_id', 'model', 'quantity', 'unit_price', 'price', 'country'}
+        try:
+            df = pd.read_csv(
+                p,
+                # nullable Int64 so a blank quantity cell can be filled below
+                dtype={'quantity': 'Int64', 'unit_price': 'float64', 'price': 'float64',
+                       'model': 'category', 'country': 'category'},
+                usecols=lambda c: c in wanted,
+                engine='c',
+            )
+        except pd.errors.EmptyDataError:
+            # empty file: no header, no rows
+            return []
+        # normalize keys: fall back to 'price' and a quantity of 1
+        if 'unit_price' not in df.columns:
+            if 'price' in df.columns:
+                df = df.rename(columns={'price': 'unit_price'})
+            else:
+                df['unit_price'] = 0.0
+        if 'quantity' not in df.columns:
+            df['quantity'] = 1
+        # blank cells get the same defaults as missing columns (quantity 1,
+        # price 0) so no NaN reaches the report
+        df['quantity'] = df['quantity'].fillna(1).astype('int64')
+        df['unit_price'] = df['unit_price'].fillna(0.0)
+        return df
     else:
         # JSON
-        with p.open(encoding='utf-8') as f:
-            data = json.load(f)
-            # Ensure numeric conversion
-            for r in data:
-                r['quantity'] = int(r.get('quantity', 1))
-                r['unit_price'] = float(r.get('unit_price', r.get('price', 0)))
-            return data
+        data = ujson_loads(p.read_text(encoding='utf-8'))
+        # Ensure numeric conversion; JSON numbers already come back as
+        # int/float, so only convert values that aren't the right type
+        for r in data:
+            q = r.get('quantity', 1)
+            r['quantity'] = q if type(q) is int else to_int(q)
+            up = r.get('unit_price', r.get('price', 0))
+            r['unit_price'] = up if type(up) is float else to_float(up)
+        return data
+
+def load_sent_emails():
+    """
+    Return metadata of every sent email, newest first.
+    Reads the single sent_emails/index.jsonl written by the email service;
+    folders from before the index existed fall back to the N.json files.
+    """
+    try:
+        with open(SENT / "index.jsonl", "rb") as f:
+            lines = f.read().split(b"\n")
+    except FileNotFoundError:
+        return _load_sent_email_files()
+    emails = []
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            emails.append(ujson_loads(line))
+        except Exception:
+            pass
+    emails.reverse()
+    return emails
+
+def _load_sent_email_files():
+    """
+    Return metadata from the per-email JSON files, newest file name first.
+    Uses _EMAIL_CACHE so a JSON file is only parsed when its mtime changes.
+    """
+    with _EMAIL_LOCK:
+        seen = set()
+        for entry in os.scandir(SENT):
+            if not entry.name.endswith(".json") or not entry.is_file():
+                continue
+            seen.add(entry.name)
+            try:
+                mtime = entry.stat().st_mtime
+                cached = _EMAIL_CACHE.get(entry.name)
+                if cached is None or cached[0] != mtime:
+                    with open(entry.path, encoding='utf-8') as f:
+                        _EMAIL_CACHE[entry.name] = (mtime, ujson_loads(f.read()))
+            except Exception:
+                pass
+        # forget files that were deleted
+        for name in list(_EMAIL_CACHE):
+            if name not in seen:
+                del _EMAIL_CACHE[name]
+        return [_EMAIL_CACHE[name][1] for name in sorted(_EMAIL_CACHE, reverse=True)]
+
+def _swap_pool_locked():
+    """Shut down _POOL and start a fresh one. Caller must hold _POOL_LOCK."""
+    global _POOL
+    _POOL.shutdown(wait=False, cancel_futures=True)
+    _POOL = concurrent.futures.ProcessPoolExecutor(max_workers=os.cpu_count())
+
+def _replace_pool(broken):
+    """
+    Swap in a fresh worker pool after a worker died (crash, out of memory).
+    A broken ProcessPoolExecutor refuses all new work, so without this every
+    later /generate would fail until the app restarts.
+    """
+    with _POOL_LOCK:
+        if _POOL is broken:
+            _swap_pool_locked()
+
+def _submit_report(*args, **kwargs):
+    """
+    Submit generate_pdf to the worker pool, replacing the pool if it is broken.
+    Reading _POOL and submitting happen under _POOL_LOCK, so another request
+    can't shut the pool down in between.
+    Returns (pool, future) so a later failure replaces the right pool.
+    """
+    with _POOL_LOCK:
+        try:
+            return _POOL, _POOL.submit(generate_pdf, *args, **kwargs)
+        except BrokenProcessPool:
+            _swap_pool_locked()
+            return _POOL, _POOL.submit(generate_pdf, *args, **kwargs)
+
+def _send_when_done(fut):
+    """Done-callback for reports that outlived the request: send them anyway."""
+    if fut.cancelled() or fut.exception() is not None:
+        return
+    try:
+        send_simulated_email(fut.result())
+    except Exception:
+        pass
 
 @app.route("/", methods=["GET"])
 def index():
     files = list_sample_files()
     # list PDFs in generated_reports
-    pdfs = sorted([p.name for p in REPORTS.glob("*.pdf")], reverse=True)
+    pdfs = sorted((e.name for e in os.scandir(REPORTS) if e.name.endswith('.pdf')), reverse=True)
     # list sent emails metadata (read JSON files)
-    emails = []
-    for j in sorted(SENT.glob("*.json"), key=lambda x: x.name, reverse=True):
-        try:
-            with j.open(encoding='utf-8') as f:
-                emails.append(json.load(f))
-        except Exception:
-            pass
+    emails = load_sent_emails()
     return render_template("index.html", data_files=files, reports=pdfs, emails=emails)
 
 @app.route("/generate", methods=["POST"])
@@ -102,7 +242,7 @@ def generate():
         return redirect(url_for('index'))
 
     rows = load_rows_from_sample(filename)
-    if not rows:
+    if len(rows) == 0:
         flash(f"No rows found in {filename}", "error")
         return redirect(url_for('index'))
 
@@ -111,9 +251,24 @@ def generate():
     timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
     out_pdf = REPORTS / f"{base_name}_{timestamp}.pdf"
 
+    pool = fut = None
     try:
-        # Generate the PDF with charts embedded
-        pdf_path = generate_pdf(rows, out_pdf, title=f"Sales Report - {base_name}")
+        # Generate the PDF with charts embedded (in a worker process)
+        pool, fut = _submit_report(rows, str(out_pdf), title=f"Sales Report - {base_name}")
+        pdf_path = fut.result(timeout=GENERATE_TIMEOUT)
+    except concurrent.futures.TimeoutError:
+        if fut.cancel():
+            flash("Report generation timed out and was cancelled", "error")
+        else:
+            # already running: let it finish and "send" it from the callback
+            fut.add_done_callback(_send_when_done)
+            flash("Report is taking longer than expected; it will appear in the lists when finished", "warning")
+        return redirect(url_for('index'))
+    except BrokenProcessPool as e:
+        if pool is not None:
+            _replace_pool(pool)
+        flash(f"Error generating PDF: {e}", "error")
+        return redirect(url_for('index'))
     except Exception as e:
         flash(f"Error generating PDF: {e}", "error")
         return redirect(url_for('index'))
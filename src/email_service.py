@@ -2,24 +2,228 @@
 """
 Simple email simulator:
 - Save a metadata JSON into sent_emails/
+- Append the same metadata to sent_emails/index.jsonl (one line per email)
 - Copy the PDF file there (so dashboard can list it)
 """
 
 import json
 from pathlib import Path
-import shutil
 import datetime
+import errno
 import os
+import sys
+try:
+    import fcntl
+except ImportError:  # Windows: no flock, ids are still unique for a single process
+    fcntl = None
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 SENT_DIR = Path.cwd() / "sent_emails"
 SENT_DIR.mkdir(parents=True, exist_ok=True)
 
+# every email's metadata, one JSON object per line, oldest first;
+# the dashboard reads this single file instead of opening each N.json
+INDEX_FILE = SENT_DIR / "index.jsonl"
+
+# Windows opens fds in text mode unless O_BINARY is given (0 elsewhere)
+_O_BINARY = getattr(os, "O_BINARY", 0)
+
+# buffer size for the plain read/write fallback copy (1 MB)
+_COPY_BUFSIZE = 1 << 20
+
+# Linux ioctl number for FICLONE (reflink / copy-on-write clone)
+_FICLONE = 0x40049409
+
+# errors that just mean "this filesystem can't clone, try something else"
+_NO_CLONE_ERRNOS = {errno.EXDEV, errno.EOPNOTSUPP, errno.ENOTSUP,
+                    errno.EINVAL, errno.ENOSYS, errno.ENOTTY, errno.EBADF}
+
+def _macos_clonefile(src, dst):
+    """
+    Ask APFS for a copy-on-write clone using clonefile() from libSystem.
+    Raises OSError if the clone is not possible.
+    """
+    import ctypes
+    try:
+        clonefile = ctypes.CDLL("/usr/lib/libSystem.dylib", use_errno=True).clonefile
+    except (OSError, AttributeError):
+        # very old macOS without clonefile
+        raise OSError(errno.ENOTSUP, "clonefile not available")
+    # clonefile refuses to overwrite, so clear any old destination first
+    try:
+        os.remove(dst)
+    except FileNotFoundError:
+        pass
+    if clonefile(os.fsencode(src), os.fsencode(dst), 0) != 0:
+        err = ctypes.get_errno()
+        raise OSError(err, os.strerror(err), str(dst))
+
+def _linux_clone(src, dst):
+    """
+    Try a reflink clone (FICLONE) first, then os.copy_file_range.
+    Both keep the data inside the kernel. Raises OSError if neither works.
+    """
+    in_fd = os.open(src, os.O_RDONLY | _O_BINARY)
+    try:
+        out_fd = os.open(dst, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | _O_BINARY, 0o644)
+        try:
+            try:
+                # same-filesystem CoW clone: O(1), no data written
+                fcntl.ioctl(out_fd, _FICLONE, in_fd)
+                return
+            except OSError as e:
+                if e.errno not in _NO_CLONE_ERRNOS or not hasattr(os, "copy_file_range"):
+                    raise
+
+            size = os.fstat(in_fd).st_size
+            copied = 0
+            while copied < size:
+                n = os.copy_file_range(in_fd, out_fd, size - copied)
+                if n == 0:
+                    break
+                copied += n
+        finally:
+            os.close(out_fd)
+    finally:
+        os.close(in_fd)
+
+def _fast_clone_or_copy(src, dst):
+    """
+    Copy src to dst as cheaply as the platform allows:
+      - macOS: clonefile (APFS copy-on-write)
+      - Linux: FICLONE reflink, then copy_file_range
+      - otherwise (or if the above are refused): _fastcopy_sendfile
+    """
+    try:
+        if sys.platform == "darwin":
+            _macos_clonefile(src, dst)
+            return
+        if sys.platform.startswith("linux"):
+            _linux_clone(src, dst)
+            return
+    except OSError as e:
+        if e.errno not in _NO_CLONE_ERRNOS:
+            raise
+    _fastcopy_sendfile(src, dst)
+
+def _fastcopy_sendfile(src, dst):
+    """
+    Copy src to dst.
+    On Linux, os.sendfile lets the kernel move the bytes directly
+    (nothing is copied through Python). Anywhere else, or if the
+    filesystem refuses sendfile, fall back to a simple 1 MB buffer loop.
+    """
+    in_fd = os.open(src, os.O_RDONLY | _O_BINARY)
+    try:
+        out_fd = os.open(dst, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | _O_BINARY, 0o644)
+        try:
+            size = os.fstat(in_fd).st_size
+            if sys.platform.startswith("linux"):
+                try:
+                    offset = 0
+                    while offset < size:
+                        sent = os.sendfile(out_fd, in_fd, offset, size - offset)
+                        if sent == 0:
+                            break
+                        offset += sent
+                    return
+                except OSError as e:
+                    if e.errno not in (errno.EINVAL, errno.ENOSYS):
+                        raise
+                    # start over with the plain loop
+                    os.lseek(in_fd, 0, os.SEEK_SET)
+                    os.ftruncate(out_fd, 0)
+                    os.lseek(out_fd, 0, os.SEEK_SET)
+
+            buf = bytearray(_COPY_BUFSIZE)
+            view = memoryview(buf)
+            with open(in_fd, "rb", buffering=0, closefd=False) as fin, \
+                 open(out_fd, "wb", buffering=0, closefd=False) as fout:
+                while True:
+                    n = fin.readinto(buf)
+                    if not n:
+                        break
+                    fout.write(view[:n])
+        finally:
+            os.close(out_fd)
+    finally:
+        os.close(in_fd)
+
+def _dump_line(meta):
+    """One JSONL line (bytes) for the index file."""
+    if orjson is not None:
+        return orjson.dumps(meta) + b"\n"
+    return json.dumps(meta).encode("utf-8") + b"\n"
+
+def _seed_index():
+    """
+    Create sent_emails/index.jsonl from the emails saved before it existed
+    (the N.json files), oldest id first.
+    Only called by _next_email_id while it holds the .next_id lock, so it
+    runs once, before any new email has written its own metadata.
+    """
+    old = []
+    for p in SENT_DIR.glob("*.json"):
+        try:
+            old.append(json.loads(p.read_text(encoding="utf-8")))
+        except Exception:
+            pass
+    old.sort(key=lambda m: m.get("id", 0))
+    # write to a temp file and rename, so readers never see half an index
+    tmp = INDEX_FILE.with_suffix(".jsonl.tmp")
+    tmp.write_bytes(b"".join(_dump_line(m) for m in old))
+    os.replace(tmp, INDEX_FILE)
+
+def _next_email_id():
+    """
+    Hand out the next email id from the counter file sent_emails/.next_id.
+    The file is locked while it is read and bumped, so two requests
+    never get the same id. The first call also builds index.jsonl from
+    older emails if it doesn't exist yet.
+    """
+    fd = os.open(SENT_DIR / ".next_id", os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        raw = os.read(fd, 32).strip()
+        if raw:
+            n = int(raw)
+        else:
+            # first run with a counter: carry on after emails saved before it existed
+            n = sum(1 for name in os.listdir(SENT_DIR) if name.endswith(".json")) + 1
+        os.lseek(fd, 0, os.SEEK_SET)
+        os.ftruncate(fd, 0)
+        os.write(fd, str(n + 1).encode())
+        if not INDEX_FILE.exists():
+            _seed_index()
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        return n
+    finally:
+        os.close(fd)
+
+def _append_to_index(meta):
+    """Append meta to sent_emails/index.jsonl."""
+    fd = os.open(INDEX_FILE, os.O_WRONLY | os.O_APPEND | os.O_CREAT | _O_BINARY, 0o644)
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        os.write(fd, _dump_line(meta))
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+    finally:
+        os.close(fd)
+
 def send_simulated_email(pdf_path, sender="abdullahkh1298@gmail.com", recipient="boss@example.com", subject="Monthly Sales Report", body="Please find attached."):
     """
     pdf_path: path to PDF that was generated
     This function will:
       - copy the PDF to sent_emails/
-      - save a small JSON with metadata for the dashboard to read
+      - save a small JSON with metadata and add it to index.jsonl
+        for the dashboard to read
     """
     pdf_path = Path(pdf_path)
     if not pdf_path.exists():
@@ -29,11 +233,11 @@ def send_simulated_email(pdf_path, sender="abdullahkh1298@gmail.com", recipient=
     ts = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
     saved_pdf_name = f"{ts}_{pdf_path.name}"
     dest_pdf = SENT_DIR / saved_pdf_name
-    shutil.copyfile(pdf_path, dest_pdf)
+    _fast_clone_or_copy(pdf_path, dest_pdf)
 
     # metadata
     meta = {
-        "id": len(list(SENT_DIR.glob("*.json"))) + 1,
+        "id": _next_email_id(),
         "timestamp": ts,
         "from": sender,
         "to": recipient,
@@ -46,6 +250,7 @@ def send_simulated_email(pdf_path, sender="abdullahkh1298@gmail.com", recipient=
     meta_file = SENT_DIR / f"{meta['id']}.json"
     with meta_file.open('w', encoding='utf-8') as f:
         json.dump(meta, f, indent=2)
+    _append_to_index(meta)
 
     # return meta for logging
     return meta
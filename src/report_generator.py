@@ -3,98 +3,277 @@ Generate a PDF sales report with embedded pie chart and daily sales plot.
 This file is intentionally commented heavily (beginner-friendly).
 """
 
+import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image, Table, TableStyle
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+from reportlab.graphics.shapes import Drawing, String
+from reportlab.graphics.charts.piecharts import Pie
+from reportlab.graphics.charts.lineplots import LinePlot
+from reportlab.graphics.widgets.markers import makeMarker
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.styles import getSampleStyleSheet
 from reportlab.lib import colors
 from reportlab.lib.units import mm
 from pathlib import Path
-import tempfile
-import os
 import datetime
+import math
+import warnings
+
+# slice colours for the pie chart (same palette the old matplotlib charts used)
+_PIE_COLORS = [colors.HexColor(c) for c in (
+    '#1f77b4', '#ff7f0e', '#2ca02c', '#d62728', '#9467bd',
+    '#8c564b', '#e377c2', '#7f7f7f', '#bcbd22', '#17becf',
+)]
+
+# ReportLab styles never change between reports, so build them once
+_STYLES = getSampleStyleSheet()
+_TITLE_STYLE = _STYLES['Title']
+_NORMAL_STYLE = _STYLES['Normal']
+_HEADING_STYLE = _STYLES['Heading3']
+_TOP_MODELS_STYLE = TableStyle([
+    ('BACKGROUND', (0,0), (-1,0), colors.HexColor('#f2f2f2')),
+    ('GRID', (0,0), (-1,-1), 0.5, colors.grey),
+    ('FONTNAME', (0,0), (-1,0), 'Helvetica-Bold'),
+])
+_SAMPLE_STYLE = TableStyle([
+    ('GRID', (0,0), (-1,-1), 0.3, colors.grey),
+    ('BACKGROUND', (0,0), (-1,0), colors.HexColor('#f0f0f0'))
+])
+
+# columns every dashboard sample file has
+SCHEMA = ('date', 'order_id', 'model', 'quantity', 'unit_price', 'country')
+
+# sample data dates look like 2025-01-31
+_DATE_FORMAT = '%Y-%m-%d'
+
+def _parse_dates(values):
+    """
+    Parse the date column once, with a fixed format so pandas can use its
+    fast C parser. Values that don't match the format (e.g. with a time, or
+    2025/01/02) are parsed again flexibly; anything still unreadable
+    becomes NaT and a warning says how many were dropped.
+    """
+    values = values if isinstance(values, pd.Series) else pd.Series(values)
+    parsed = pd.to_datetime(values, format=_DATE_FORMAT, errors='coerce', cache=True)
+    retry = parsed.isna() & values.notna()
+    if retry.any():
+        parsed[retry] = pd.to_datetime(values[retry], format='mixed', errors='coerce')
+        bad = int((parsed.isna() & values.notna()).sum())
+        if bad:
+            warnings.warn(f"{bad} date value(s) could not be parsed and are left out of the daily chart")
+    return parsed
+
+def _safe_df_from_rows_fast(rows):
+    """
+    Fast path of _safe_df_from_rows for rows that follow SCHEMA exactly.
+    Numeric columns are filled into preallocated numpy arrays with plain
+    r['key'] lookups (no .get fallbacks).
+    Raises KeyError if a row is missing a SCHEMA column.
+    """
+    n = len(rows)
+    dates = [None] * n
+    orders = [None] * n
+    models = [None] * n
+    countries = [None] * n
+    qty = np.empty(n, dtype=np.int64)
+    price = np.empty(n, dtype=np.float64)
+    for i, r in enumerate(rows):
+        dates[i] = r['date']
+        orders[i] = r['order_id']
+        models[i] = r['model']
+        qty[i] = r['quantity']
+        price[i] = r['unit_price']
+        countries[i] = r['country']
+
+    df = pd.DataFrame({
+        'date': _parse_dates(dates),
+        'order_id': orders,
+        'model': models,
+        'quantity': qty,
+        'unit_price': price,
+        'total': qty * price,
+        'country': countries,
+    }, copy=False)
+    return df
 
 def _safe_df_from_rows(rows):
     """
     Convert a list-of-dicts 'rows' into a pandas DataFrame.
     Ensure numeric types and compute total = quantity * unit_price.
+    Columns are collected in one pass and the total is a single numpy
+    multiply, so pandas doesn't have to infer types row by row.
     """
-    df = pd.DataFrame(rows)
-    # If quantity or unit_price not present, try fallback keys
-    if 'quantity' not in df.columns:
-        df['quantity'] = 1
-    if 'unit_price' not in df.columns:
-        if 'price' in df.columns:
-            df['unit_price'] = df['price']
-        else:
-            df['unit_price'] = 0.0
+    dates = []
+    models = []
+    qty = []
+    price = []
+    orders = []
+    for r in rows:
+        dates.append(r.get('date'))
+        models.append(r.get('model'))
+        # If quantity or unit_price not present, try fallback keys
+        qty.append(r.get('quantity', 1))
+        price.append(r.get('unit_price', r.get('price', 0.0)))
+        orders.append(r.get('order_id'))
 
     # ensure types
-    df['quantity'] = df['quantity'].astype(int)
-    df['unit_price'] = df['unit_price'].astype(float)
-    df['total'] = df['quantity'] * df['unit_price']
+    qty = np.asarray(qty).astype(np.int64)
+    price = np.asarray(price).astype(np.float64)
+    total = qty * price
+
+    columns = {
+        'date': dates,
+        'model': models,
+        'quantity': qty,
+        'unit_price': price,
+        'total': total,
+    }
+    # only keep order_id when the data actually has it
+    if any(o is not None for o in orders):
+        columns['order_id'] = orders
+    df = pd.DataFrame(columns, copy=False)
+    df['date'] = _parse_dates(df['date'])
     return df
 
-def _create_charts(df, tmpdir):
+def _revenue_by_model(df):
     """
-    Create two charts:
+    Sum 'total' per model without pandas' groupby machinery.
+    pd.factorize gives every model an integer code (no sorting, so mixed
+    types like 101 and "Honda Civic" are fine) and np.bincount adds up
+    the totals per code.
+    Returns (models, sums) as numpy arrays, highest revenue first.
+    """
+    # rows without a model get code -1 and are left out, like groupby does
+    codes, uniq = pd.factorize(df['model'].to_numpy())
+    keep = codes >= 0
+    # NaN totals count as 0, the same as groupby().sum() skipping them
+    totals = df['total'].to_numpy(dtype=np.float64)
+    totals = np.where(np.isnan(totals), 0.0, totals)
+    sums = np.bincount(codes[keep], weights=totals[keep], minlength=len(uniq))
+    uniq = np.asarray(uniq, dtype=object)
+
+    # biggest share first
+    rank = np.argsort(-sums, kind='stable')
+    return uniq[rank], sums[rank]
+
+def _no_data_drawing(width, height):
+    """Placeholder drawing used when a chart has nothing to show."""
+    drawing = Drawing(width, height)
+    drawing.add(String(width / 2, height / 2, "No data to chart",
+                       fontName='Helvetica', fontSize=9,
+                       fillColor=colors.grey, textAnchor='middle'))
+    return drawing
+
+def _create_drawings(by_model, daily):
+    """
+    Create two charts as ReportLab vector drawings (no image rasterizing):
       - pie chart of sales by model (revenue share)
       - daily sales line chart
-    Save both images into tmpdir and return their paths.
+    by_model is the (models, sums) pair already computed by generate_pdf,
+    daily is a Series of revenue per calendar day (sorted by date).
+    Drawings are Flowables, so both can go straight into the story.
+    A chart with nothing to draw (no rows, zero revenue, no valid dates)
+    becomes a "No data to chart" placeholder instead.
     """
-    # Pie chart data
-    by_model = df.groupby('model')['total'].sum().sort_values(ascending=False)
-
-    pie_path = tmpdir / "pie.png"
-    plt.figure(figsize=(4,4))
-    # autopct shows percent; startangle rotates chart
-    by_model.plot.pie(autopct='%1.1f%%', startangle=140)
-    plt.ylabel('')  # remove default y-label
-    plt.title('Sales by Model')
-    plt.tight_layout()
-    plt.savefig(pie_path)
-    plt.close()
-
-    # Daily totals
-    daily = df.groupby(df['date'])['total'].sum().reset_index()
-    daily['date'] = pd.to_datetime(daily['date'])
-    daily = daily.sort_values('date')
-
-    daily_path = tmpdir / "daily.png"
-    plt.figure(figsize=(6,3))
-    plt.plot(daily['date'], daily['total'], marker='o', linewidth=1)
-    plt.title('Daily Sales')
-    plt.xlabel('Date')
-    plt.ylabel('Revenue ($)')
-    plt.grid(axis='y', linestyle='--', alpha=0.4)
-    plt.tight_layout()
-    plt.savefig(daily_path)
-    plt.close()
-
-    return str(pie_path), str(daily_path)
+    models, sums = by_model
+    grand_total = float(sums.sum()) if len(sums) else 0.0
+    if grand_total <= 0:
+        pie_drawing = _no_data_drawing(420, 180)
+    else:
+        pie_drawing = _create_pie(models, sums, grand_total)
+
+    if len(daily) == 0:
+        daily_drawing = _no_data_drawing(420, 120)
+    else:
+        daily_drawing = _create_line(daily)
+
+    return pie_drawing, daily_drawing
+
+def _create_pie(models, sums, grand_total):
+    """Pie chart of revenue share per model."""
+    pie_drawing = Drawing(420, 180)
+    pie = Pie()
+    pie.x, pie.y = 140, 15
+    pie.width = pie.height = 150
+    pie.data = [float(v) for v in sums]
+    # label each slice with the model and its share
+    pie.labels = [f"{m} ({v / grand_total:.1%})" for m, v in zip(models, sums)]
+    pie.startAngle = 140
+    pie.sideLabels = True
+    pie.slices.strokeColor = colors.white
+    pie.slices.fontName = 'Helvetica'
+    for i in range(len(pie.data)):
+        pie.slices[i].fillColor = _PIE_COLORS[i % len(_PIE_COLORS)]
+    pie_drawing.add(pie)
+    return pie_drawing
+
+def _create_line(daily):
+    """Daily revenue line; x is the day number so gaps between dates keep their size."""
+    daily_drawing = Drawing(420, 120)
+    plot = LinePlot()
+    plot.x, plot.y = 50, 25
+    plot.width, plot.height = 360, 85
+    plot.data = [[(d.toordinal(), float(v)) for d, v in zip(daily.index, daily.to_numpy())]]
+    plot.lines[0].strokeColor = _PIE_COLORS[0]
+    plot.lines[0].strokeWidth = 1
+    plot.lines[0].symbol = makeMarker('FilledCircle', size=4)
+    first = min(x for x, _ in plot.data[0])
+    last = max(x for x, _ in plot.data[0])
+    if first == last:
+        # a single day gives the axis no range; pad it by a day either side
+        plot.xValueAxis.valueMin, plot.xValueAxis.valueMax = first - 1, last + 1
+        plot.xValueAxis.valueStep = 1
+    else:
+        # ticks on whole days only (about six labels), never half a day
+        plot.xValueAxis.valueStep = max(1, math.ceil((last - first) / 6))
+    plot.xValueAxis.labelTextFormat = lambda v: datetime.date.fromordinal(int(v)).strftime(_DATE_FORMAT)
+    plot.xValueAxis.labels.fontName = 'Helvetica'
+    plot.xValueAxis.labels.fontSize = 7
+    # 13,800 / 2.5: decimals only when the tick needs them
+    plot.yValueAxis.labelTextFormat = lambda v: f"{v:,.2f}".rstrip('0').rstrip('.')
+    plot.yValueAxis.labels.fontName = 'Helvetica'
+    plot.yValueAxis.labels.fontSize = 7
+    plot.yValueAxis.visibleGrid = True
+    plot.yValueAxis.gridStrokeColor = colors.lightgrey
+    plot.yValueAxis.gridStrokeDashArray = (2, 2)
+    daily_drawing.add(plot)
+    return daily_drawing
 
 def generate_pdf(rows, out_pdf_path, title=None):
     """
     Main function.
-    - rows: list of dicts (sales rows)
+    - rows: list of dicts (sales rows), or a DataFrame that already has
+      quantity and unit_price columns
     - out_pdf_path: where to save the final PDF (string or Path)
     - title: optional title to place on top
     Returns: path to generated PDF
     """
     # convert to DataFrame and compute totals
-    df = _safe_df_from_rows(rows)
+    if isinstance(rows, pd.DataFrame):
+        # already typed (e.g. from pd.read_csv), only the total and
+        # the parsed dates are missing
+        df = rows.assign(total=rows['quantity'] * rows['unit_price'],
+                         date=_parse_dates(rows['date']))
+    else:
+        try:
+            df = _safe_df_from_rows_fast(rows)
+        except KeyError:
+            # rows don't follow SCHEMA, use the forgiving path
+            df = _safe_df_from_rows(rows)
 
     # summary numbers used at top of PDF
     total_revenue = df['total'].sum()
     orders = df['order_id'].nunique() if 'order_id' in df.columns else len(df)
-    top_models = df.groupby('model')['total'].sum().sort_values(ascending=False).head(5)
+    # revenue per model, computed once and shared with the pie chart
+    by_model = _revenue_by_model(df)
+    top_models = zip(by_model[0][:5], by_model[1][:5])
 
-    # create temporary directory for images
-    tmpdir = Path(tempfile.mkdtemp(prefix="report_"))
+    # Daily totals: dates are already parsed; grouping by calendar day adds up
+    # rows that carry a time of day, and a sorted groupby keeps them in order
+    daily = df.groupby(df['date'].dt.normalize(), sort=True)['total'].sum()
 
-    # create charts and get their file paths
-    pie_img, daily_img = _create_charts(df, tmpdir)
+    # create charts as vector drawings
+    pie_chart, daily_chart = _create_drawings(by_model, daily)
 
     # ensure output folder exists
     out_pdf_path = Path(out_pdf_path)
@@ -104,81 +283,73 @@ def generate_pdf(rows, out_pdf_path, title=None):
     doc = SimpleDocTemplate(str(out_pdf_path), pagesize=A4,
                             rightMargin=20,leftMargin=20,
                             topMargin=20,bottomMargin=20)
-    styles = getSampleStyleSheet()
     story = []
 
     # Title
     report_title = title or f"Sales Report - {datetime.datetime.now().strftime('%Y-%m-%d')}"
-    story.append(Paragraph(report_title, styles['Title']))
+    story.append(Paragraph(report_title, _TITLE_STYLE))
     story.append(Spacer(1, 6))
 
     # Summary block
-    story.append(Paragraph(f"<b>Total Revenue:</b> ${total_revenue:,.2f}", styles['Normal']))
-    story.append(Paragraph(f"<b>Orders:</b> {orders}", styles['Normal']))
+    story.append(Paragraph(f"<b>Total Revenue:</b> ${total_revenue:,.2f}", _NORMAL_STYLE))
+    story.append(Paragraph(f"<b>Orders:</b> {orders}", _NORMAL_STYLE))
     story.append(Spacer(1, 12))
 
     # Top models table
-    story.append(Paragraph("<b>Top Models</b>", styles['Heading3']))
+    story.append(Paragraph("<b>Top Models</b>", _HEADING_STYLE))
     table_data = [["Model", "Revenue ($)"]]
-    for model, value in top_models.items():
+    for model, value in top_models:
         table_data.append([model, f"{value:,.2f}"])
     t = Table(table_data, colWidths=[90*mm, 60*mm])
-    t.setStyle(TableStyle([
-        ('BACKGROUND', (0,0), (-1,0), colors.HexColor('#f2f2f2')),
-        ('GRID', (0,0), (-1,-1), 0.5, colors.grey),
-        ('FONTNAME', (0,0), (-1,0), 'Helvetica-Bold'),
-    ]))
+    t.setStyle(_TOP_MODELS_STYLE)
     story.append(t)
     story.append(Spacer(1, 12))
 
     # Pie chart embedded
-    story.append(Paragraph("<b>Sales by Model</b>", styles['Heading3']))
-    story.append(Image(pie_img, width=180, height=180))
+    story.append(Paragraph("<b>Sales by Model</b>", _HEADING_STYLE))
+    story.append(pie_chart)
     story.append(Spacer(1, 12))
 
     # Daily chart embedded
-    story.append(Paragraph("<b>Sales Over Time</b>", styles['Heading3']))
-    story.append(Image(daily_img, width=420, height=120))
+    story.append(Paragraph("<b>Sales Over Time</b>", _HEADING_STYLE))
+    story.append(daily_chart)
     story.append(Spacer(1, 12))
 
     # Sample rows table (first 20)
-    story.append(Paragraph("<b>Sample Sales Rows</b>", styles['Heading3']))
+    story.append(Paragraph("<b>Sample Sales Rows</b>", _HEADING_STYLE))
     table_rows = [["Date","Order","Model","Qty","Unit Price","Total"]]
-    for _, r in df.head(20).iterrows():
+    # read whole columns once instead of building a Series per row
+    head = df.head(20)
+    missing = ['-'] * len(head)
+    # show the time too, but only if the data actually has one
+    has_time = (head['date'].dropna() != head['date'].dropna().dt.normalize()).any()
+    date_format = _DATE_FORMAT + ' %H:%M:%S' if has_time else _DATE_FORMAT
+    dates = head['date'].dt.strftime(date_format).fillna('-').to_numpy()
+    orders = head['order_id'].to_numpy() if 'order_id' in head.columns else missing
+    models = head['model'].to_numpy() if 'model' in head.columns else missing
+    qtys = head['quantity'].to_numpy()
+    ups = head['unit_price'].to_numpy()
+    tots = head['total'].to_numpy()
+    for date, order, model, qty, up, tot in zip(dates, orders, models, qtys, ups, tots):
         table_rows.append([
-            str(r['date']),
-            str(r.get('order_id','-')),
-            str(r.get('model','-')),
-            str(r.get('quantity',1)),
-            f"{r.get('unit_price',0.0):,.2f}",
-            f"{r.get('total',0.0):,.2f}"
+            str(date),
+            str(order),
+            str(model),
+            str(qty),
+            f"{up:,.2f}",
+            f"{tot:,.2f}"
         ])
-    t2 = Table(table_rows, colWidths=[70,60,120,40,60,60])
-    t2.setStyle(TableStyle([
-        ('GRID', (0,0), (-1,-1), 0.3, colors.grey),
-        ('BACKGROUND', (0,0), (-1,0), colors.HexColor('#f0f0f0'))
-    ]))
+    # a date with a time needs a wider first column (same total width)
+    col_widths = [100,60,90,40,60,60] if has_time else [70,60,120,40,60,60]
+    t2 = Table(table_rows, colWidths=col_widths)
+    t2.setStyle(_SAMPLE_STYLE)
     story.append(t2)
     story.append(Spacer(1, 12))
 
     # Footer
-    story.append(Paragraph("Generated by Sales Report Automation", styles['Normal']))
+    story.append(Paragraph("Generated by Sales Report Automation", _NORMAL_STYLE))
 
     # build document
     doc.build(story)
 
-    # cleanup temporary images and directory
-    try:
-        if os.path.exists(pie_img):
-            os.remove(pie_img)
-        if os.path.exists(daily_img):
-            os.remove(daily_img)
-        # remove tmpdir if empty
-        try:
-            os.rmdir(tmpdir)
-        except OSError:
-            pass
-    except Exception:
-        pass
-
     return str(out_pdf_path)